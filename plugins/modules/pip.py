@@ -259,7 +259,9 @@ virtualenv:
   sample: "/tmp/virtualenv"
 '''
 
-import argparse
+import functools
+import hashlib
+import itertools
 import os
 import re
 import sys
@@ -267,32 +269,73 @@ import tempfile
 import operator
 import shlex
 
-from ansible.module_utils.common.text.converters import to_native
 from ansible.module_utils.basic import AnsibleModule, is_executable
 from ansible.module_utils.common.locale import get_best_parsable_locale
 
 
-_VCS_RE = re.compile(r'(svn|git|hg|bzr)\+')
+# Summary lines uv writes to stderr when it changes an environment,
+# e.g. "Installed 5 packages in 5ms"
+_CHANGED_SUMMARY_RE = re.compile(r'^(?:Installed|Uninstalled)\s+\d+', re.MULTILINE)
+
+# --quiet, or a cluster of short flags that includes -q, e.g. -qq or -qv
+_QUIET_ARG_RE = re.compile(r'--quiet|-[A-Za-z]*q[A-Za-z]*')
+
+_CMD_OPTION_RE = re.compile(r'--[A-Za-z0-9][A-Za-z0-9-]*')
 
 op_dict = {">=": operator.ge, "<=": operator.le, ">": operator.gt,
            "<": operator.lt, "==": operator.eq, "!=": operator.ne, "~=": operator.ge}
 
+# Split on commas, a fragment that contains "[" but no "]" opens [extras],
+# which continue up to and including the next fragment that contains "]".
+_PACKAGE_FRAGMENTS_PATTERN = (
+    r'(?:[^,\]]*\[[^,\]]*(?=,|\Z)(?:,[^,\]]*(?=,|\Z))*(?:,[^,]*)?|[^,]*)(?=,|\Z)'
+)
+
+# One package spec: a name (optionally with [extras], which may contain commas)
+# followed by any comma separated version specifiers.
+_PACKAGE_SPEC_RE = re.compile(
+    _PACKAGE_FRAGMENTS_PATTERN
+    + r'(?:,(?=\s*(?:' + '|'.join(re.escape(s) for s in op_dict) + r'))'
+    + _PACKAGE_FRAGMENTS_PATTERN + r')*'
+)
+
+
+def _is_quiet(command):
+    """Return True if command suppresses the summary uv writes to stderr, False otherwise.
 
-def _is_vcs_url(name):
-    """Test whether a name is a vcs url or not."""
-    return re.match(_VCS_RE, name)
+    >>> _is_quiet(['uv', '--quiet', 'pip', 'install', 'requests'])
+    True
+    >>> _is_quiet(['uv', 'pip', 'install', '-qv', 'requests'])
+    True
+    >>> _is_quiet(['uv', 'pip', 'install', '--index-url', 'https://example.com/simple', 'requests'])
+    False
+    """
+    return any(_QUIET_ARG_RE.fullmatch(arg) for arg in command)
 
 
 def _is_venv_command(command):
-    venv_parser = argparse.ArgumentParser()
-    venv_parser.add_argument('-m', type=str)
+    """Return True if command is an invocation of `pyvenv` or `python -m venv`, False otherwise.
+
+    >>> _is_venv_command('python3 -m venv')
+    True
+    >>> _is_venv_command('/usr/bin/python3 -mvenv')
+    True
+    >>> _is_venv_command('uv venv')
+    False
+    """
     argv = shlex.split(command)
+    if not argv:
+        return False
     if argv[0] == 'pyvenv':
         return True
-    args, dummy = venv_parser.parse_known_args(argv[1:])
-    if args.m == 'venv':
-        return True
-    return False
+    module_name = None
+    args = iter(argv[1:])
+    for arg in args:
+        if arg == '-m':
+            module_name = next(args, None)
+        elif arg.startswith('-m'):
+            module_name = arg[2:]
+    return module_name == 'venv'
 
 
 def _is_probably_uv_venv_command(command):
@@ -308,46 +351,36 @@ def _is_probably_uv_venv_command(command):
     return False
 
 
-def _is_package_name(name):
-    """Test whether the name is a package name or a version specifier."""
-    return not name.lstrip().startswith(tuple(op_dict.keys()))
-
-
 def _recover_package_name(names):
     """Recover package names as list from user's raw input.
 
     :input: a mixed and invalid list of names or version specifiers
     :return: a list of valid package name
 
-    eg.
-    input: ['django>1.11.1', '<1.11.3', 'ipaddress', 'simpleproject>1.1.0', '<2.0.0']
-    return: ['django>1.11.1,<1.11.3', 'ipaddress', 'simpleproject>1.1.0,<2.0.0']
-
-    input: ['django>1.11.1,<1.11.3,ipaddress', 'simpleproject>1.1.0,<2.0.0']
-    return: ['django>1.11.1,<1.11.3', 'ipaddress', 'simpleproject>1.1.0,<2.0.0']
+    >>> _recover_package_name(['django>1.11.1', '<1.11.3', 'ipaddress', 'simpleproject>1.1.0', '<2.0.0'])
+    ['django>1.11.1,<1.11.3', 'ipaddress', 'simpleproject>1.1.0,<2.0.0']
+    >>> _recover_package_name(['django>1.11.1,<1.11.3,ipaddress', 'simpleproject>1.1.0,<2.0.0'])
+    ['django>1.11.1,<1.11.3', 'ipaddress', 'simpleproject>1.1.0,<2.0.0']
+    >>> _recover_package_name(['requests[socks,use_chardet_on_py3]>=2.0,<3', 'six'])
+    ['requests[socks,use_chardet_on_py3]>=2.0,<3', 'six']
+    >>> _recover_package_name(['foo[a', 'b'])
+    ['foo[a,b']
+    >>> _recover_package_name(['a][', 'b', 'c]', 'd'])
+    ['a][', 'b', 'c]', 'd']
+    >>> _recover_package_name(['a,', 'b'])
+    ['a', '', 'b']
     """
-    # rebuild input name to a flat list so we can tolerate any combination of input
-    tmp = []
-    for one_line in names:
-        tmp.extend(one_line.split(","))
-    names = tmp
-
-    # reconstruct the names
-    name_parts = []
+    # join input names to a single string so we can tolerate any combination of input
+    names = ",".join(names)
+
     package_names = []
-    in_brackets = False
-    for name in names:
-        if _is_package_name(name) and not in_brackets:
-            if name_parts:
-                package_names.append(",".join(name_parts))
-            name_parts = []
-        if "[" in name:
-            in_brackets = True
-        if in_brackets and "]" in name:
-            in_brackets = False
-        name_parts.append(name)
-    package_names.append(",".join(name_parts))
-    return package_names
+    pos = 0
+    while True:
+        match = _PACKAGE_SPEC_RE.match(names, pos)
+        package_names.append(match.group())
+        pos = match.end() + 1  # skip the separating comma
+        if pos > len(names):
+            return package_names
 
 
 def _get_cmd_options(module, cmd):
@@ -356,23 +389,38 @@ def _get_cmd_options(module, cmd):
     if rc != 0:
         module.fail_json(msg="Could not get output from %s: %s" % (thiscmd, stdout + stderr))
 
-    words = stdout.strip().split()
-    cmd_options = [x for x in words if x.startswith('--')]
+    cmd_options = _CMD_OPTION_RE.findall(stdout)
     return cmd_options
 
 
+@functools.lru_cache(maxsize=1)
+def _lang_env(module):
+    '''Return locale environment variables for parsable command output.'''
+    locale = get_best_parsable_locale(module)
+    return {'LANG': locale, 'LC_ALL': locale, 'LC_MESSAGES': locale}
+
+
 def _get_packages(module, pip, chdir):
-    '''Return results of pip command to get packages.'''
-    # Try 'pip list' command first.
+    '''Return a digest of the packages listed by pip command.'''
     command = pip + ['list', '--format=freeze']
-    locale = get_best_parsable_locale(module)
-    lang_env = {'LANG': locale, 'LC_ALL': locale, 'LC_MESSAGES': locale}
-    rc, out, err = module.run_command(command, cwd=chdir, environ_update=lang_env)
+    rc, out, err = module.run_command(command, cwd=chdir, environ_update=_lang_env(module))
 
     if rc != 0:
             _fail(module, command, out, err)
 
-    return ' '.join(command), out, err
+    # Sorted, so the digest doesn't depend on the order uv lists packages in
+    digest = hashlib.blake2b(digest_size=16)
+    for line in sorted(out.splitlines()):
+        digest.update(line.encode('utf-8', 'surrogateescape'))
+        digest.update(b'\n')
+    return digest.digest()
+
+
+@functools.lru_cache(maxsize=8)
+def _find_bin(module, basename):
+    '''Return the path of basename found on PATH, or None.'''
+    # Cached because creating a virtualenv and running uv pip both look up uv.
+    return module.get_bin_path(basename)
 
 
 def _get_pip(module, env=None, executable=None):
@@ -390,9 +438,8 @@ def _get_pip(module, env=None, executable=None):
             candidate_argvs = (argv,)
 
     if pip is None:
-            opt_dirs = []
             for basename, *rest in candidate_argvs:
-                uv = module.get_bin_path(basename, False, opt_dirs)
+                uv = _find_bin(module, basename)
                 if uv is not None:
                     pip = [uv, *rest]
                     break
@@ -423,7 +470,10 @@ def setup_virtualenv(module, env, chdir, out, err):
     # Find the binary for the command in the PATH
     # and switch the command for the explicit path.
     if os.path.basename(cmd[0]) == cmd[0]:
-        cmd[0] = module.get_bin_path(cmd[0], True)
+        path = _find_bin(module, cmd[0])
+        if path is None:
+            module.fail_json(msg=f'Failed to find required executable "{cmd[0]}" in PATH')
+        cmd[0] = path
 
     # Add the system-site-packages option if that
     # is enabled, otherwise explicitly set the option
@@ -479,27 +529,30 @@ class Package:
     """
 
     # https://packaging.python.org/en/latest/specifications/name-normalization/#name-normalization
-    _CANONICALIZE_RE = re.compile(r'[-_.]+')
-
-    # https://packaging.python.org/en/latest/specifications/name-normalization/#name-format
-    _NAME_RE = re.compile(r'[A-Z0-9]|[A-Z0-9][A-Z0-9._-]*[A-Z0-9]', re.IGNORECASE)
+    _CANONICALIZE_TABLE = str.maketrans('_.', '--')
 
     _VERSION_OPS_RE = re.compile('|'.join(re.escape(s) for s in op_dict))
 
+    __slots__ = ('_unparsed', '_has_version_specifier')
+
     def __init__(self, requirement):
             self._unparsed = requirement
-            self.name = self._NAME_RE.match(requirement)
+            self._has_version_specifier = None
 
     @property
     def has_version_specifier(self):
-        if self._VERSION_OPS_RE.search(self._unparsed):
-            return True
-        return False
+        # Only read for one package, so search on first use rather than in __init__
+        if self._has_version_specifier is None:
+            self._has_version_specifier = self._VERSION_OPS_RE.search(self._unparsed) is not None
+        return self._has_version_specifier
 
     @staticmethod
     def canonicalize_name(name):
-        # This is taken from PEP 503.
-        return Package._CANONICALIZE_RE.sub("-", name).lower()
+        # This is taken from PEP 503, runs of [-_.] become a single "-".
+        name = name.translate(Package._CANONICALIZE_TABLE).lower()
+        while '--' in name:
+            name = name.replace('--', '-')
+        return name
 
     def __str__(self):
         return self._unparsed
@@ -508,31 +561,34 @@ class Package:
         return f'{self.__class__.__name__}({self._unparsed})'
 
 
-def main():
-    state_map = dict(
-        present=['install'],
-        absent=['uninstall'],
-        latest=['install', '-U'],
-        forcereinstall=['install', '-U', '--force-reinstall'],
-    )
+_STATE_MAP = dict(
+    present=['install'],
+    absent=['uninstall'],
+    latest=['install', '-U'],
+    forcereinstall=['install', '-U', '--force-reinstall'],
+)
+
+_ARGUMENT_SPEC = dict(
+    state=dict(type='str', default='present', choices=list(_STATE_MAP)),
+    name=dict(type='list', elements='str'),
+    version=dict(type='str'),
+    requirements=dict(type='str'),
+    virtualenv=dict(type='path'),
+    virtualenv_site_packages=dict(type='bool', default=False),
+    virtualenv_command=dict(type='str', default='uv venv'),
+    virtualenv_python=dict(type='str'),
+    extra_args=dict(type='str'),
+    editable=dict(type='bool', default=False),
+    chdir=dict(type='path'),
+    executable=dict(type='str', default='uv pip'),
+    umask=dict(type='str'),
+    break_system_packages=dict(type='bool', default=False),
+)
+
 
+def main():
     module = AnsibleModule(
-        argument_spec=dict(
-            state=dict(type='str', default='present', choices=list(state_map.keys())),
-            name=dict(type='list', elements='str'),
-            version=dict(type='str'),
-            requirements=dict(type='str'),
-            virtualenv=dict(type='path'),
-            virtualenv_site_packages=dict(type='bool', default=False),
-            virtualenv_command=dict(type='str', default='uv venv'),
-            virtualenv_python=dict(type='str'),
-            extra_args=dict(type='str'),
-            editable=dict(type='bool', default=False),
-            chdir=dict(type='path'),
-            executable=dict(type='str', default='uv pip'),
-            umask=dict(type='str'),
-            break_system_packages=dict(type='bool', default=False),
-        ),
+        argument_spec=_ARGUMENT_SPEC,
         required_one_of=[['name', 'requirements']],
         mutually_exclusive=[['name', 'requirements'], ['executable', 'virtualenv']],
         supports_check_mode=True,
@@ -556,7 +612,7 @@ def main():
             umask = int(umask, 8)
         except Exception:
             module.fail_json(msg="umask must be an octal integer",
-                             details=to_native(sys.exc_info()[1]))
+                             details=str(sys.exc_info()[1]))
 
     old_umask = None
     if umask is not None:
@@ -572,18 +628,21 @@ def main():
         err = ''
         out = ''
 
+        env_bin = None
         if env:
-            if not os.path.exists(os.path.join(env, 'bin', 'activate')):
+            env_bin = os.path.join(env, 'bin')
+            try:
+                os.stat(env_bin + os.sep + 'activate')
+            except OSError:
                 venv_created = True
                 out, err = setup_virtualenv(module, env, chdir, out, err)
-            py_bin = os.path.join(env, 'bin', 'python')
+            py_bin = env_bin + os.sep + 'python'
         else:
             py_bin = module.params['executable'] or sys.executable
 
         pip = _get_pip(module, env, module.params['executable'])
 
-        cmd = pip + state_map[state]
-        cmd.extend(['--python', py_bin])
+        cmd_parts = [pip, _STATE_MAP[state], ['--python', py_bin]]
 
         # If there's a virtualenv we want things we install to be able to use other
         # installations that exist as binaries within this virtualenv. Example: we
@@ -591,19 +650,9 @@ def main():
         # not just a python package that will be found by calling the right python.
         # So if there's a virtualenv, we add that bin/ to the beginning of the PATH
         # in run_command by setting path_prefix here.
-        path_prefix = None
-        if env:
-            path_prefix = os.path.join(env, 'bin')
+        path_prefix = env_bin
 
-        # Automatically apply -e option to extra_args when source is a VCS url. VCS
-        # includes those beginning with svn+, git+, hg+ or bzr+
-        has_vcs = False
         if name:
-            for pkg in name:
-                if pkg and _is_vcs_url(pkg):
-                    has_vcs = True
-                    break
-
             # convert raw input package names to Package instances
             packages = [Package(pkg) for pkg in _recover_package_name(name)]
             # check invalid combination of arguments
@@ -631,7 +680,7 @@ def main():
                 extra_args = ' '.join(args_list)
 
         if extra_args:
-            cmd.extend(shlex.split(extra_args))
+            cmd_parts.append(shlex.split(extra_args))
 
         if module.params['break_system_packages']:
             # Using an env var instead of the `--break-system-packages` option, to avoid failing under pip 23.0.0 and earlier.
@@ -639,15 +688,17 @@ def main():
             os.environ['PIP_BREAK_SYSTEM_PACKAGES'] = '1'
 
         if name:
-            cmd.extend(to_native(p) for p in packages)
+            cmd_parts.append([p._unparsed for p in packages])
         elif requirements:
-            cmd.extend(['-r', requirements])
+            cmd_parts.append(['-r', requirements])
         else:
             module.exit_json(
                 changed=False,
                 warnings=["No valid name or requirements file found."],
             )
 
+        cmd = list(itertools.chain.from_iterable(cmd_parts))
+
         if module.check_mode:
             if extra_args or requirements or state == 'latest' or not name:
                 module.exit_json(changed=True)
@@ -664,9 +715,11 @@ def main():
             changed = bool(dryrun_match)
             module.exit_json(changed=changed, cmd=cmd, stdout=out, stderr=err)
 
-        out_freeze_before = None
-        if requirements or has_vcs:
-            dummy, out_freeze_before, dummy = _get_packages(module, pip, chdir)
+        # Changes are detected from uv's summary on stderr. When that is silenced
+        # compare the installed packages before and after instead.
+        packages_before = None
+        if _is_quiet(cmd):
+            packages_before = _get_packages(module, pip, chdir)
 
         rc, out_pip, err_pip = module.run_command(cmd, path_prefix=path_prefix, cwd=chdir)
         out += out_pip
@@ -677,14 +730,10 @@ def main():
         elif rc != 0:
             _fail(module, cmd, out, err)
 
-        if state == 'absent':
-            changed = 'Successfully uninstalled' in out_pip
+        if packages_before is None:
+            changed = bool(_CHANGED_SUMMARY_RE.search(err_pip))
         else:
-            if out_freeze_before is None:
-                changed = 'Successfully installed' in out_pip
-            else:
-                dummy, out_freeze_after, dummy = _get_packages(module, pip, chdir)
-                changed = out_freeze_before != out_freeze_after
+            changed = packages_before != _get_packages(module, pip, chdir)
 
         changed = changed or venv_created
 